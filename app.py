@@ -2,12 +2,13 @@
 Streamlit app for Parking Zones Visualization
 """
 import streamlit as st
-import tempfile
-import os
 from streamlit.components.v1 import html as components_html
 
 from main import generate_map
-from config import LOCATIONS, get_tile_provider
+from parking_zones import fetch_graph
+from config import LOCATIONS, PROVIDER_NAME_TO_ID, setup_logging
+
+setup_logging()
 
 # Page configuration
 st.set_page_config(
@@ -36,8 +37,7 @@ st.markdown("""
 
 def _get_tile_provider_options():   # noqa C901
     """Get available tile provider options."""
-    tile_providers = get_tile_provider('all')
-    return {config['name']: pid for pid, config in tile_providers.items()}
+    return PROVIDER_NAME_TO_ID
 
 def _render_location_settings():
     """Render location selection UI and return selected location."""
@@ -66,12 +66,20 @@ def get_map_settings():
     st.header("🔧 Settings")
     selected_location = _render_location_settings()
     tile_provider_id = _render_map_style_settings()
-    
-    return {
+
+    # Reuse the settings from the previous rerun if the selection hasn't changed
+    settings_key = (selected_location, tile_provider_id)
+    if st.session_state.get('last_settings_key') == settings_key:
+        return st.session_state['last_settings']
+
+    settings = {
         'lat': LOCATIONS[selected_location]['lat'],
         'lon': LOCATIONS[selected_location]['lon'],
         'tile_provider': tile_provider_id
     }
+    st.session_state['last_settings_key'] = settings_key
+    st.session_state['last_settings'] = settings
+    return settings
 
 
 def display_coordinates(selected_location):
@@ -99,32 +107,35 @@ def show_instructions():
         """)
 
 
+# Share one street graph per area across sessions and reruns. cache_resource returns
+# the same object without copying, so the graph must not be mutated.
+_get_osmnx_graph = st.cache_resource(show_spinner=False)(fetch_graph)
+
+
+@st.cache_data(show_spinner=False)
+def _build_map_html(lat: float, lon: float, tile_provider: str) -> str:
+    """Generate the map and return its HTML, cached per location and tile provider."""
+    return generate_map(
+        lat=lat,
+        lon=lon,
+        tile_provider=tile_provider,
+        in_memory=True,
+        graph_fetcher=_get_osmnx_graph
+    )
+
+
 def handle_map_generation(lat, lon, tile_provider):
     """Handle the map generation process with proper error handling."""
     with st.spinner("Generating map... This might take a moment..."):
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmpfile:
-                output_file = tmpfile.name
-
-            result = generate_map(
-                lat=lat,
-                lon=lon,
-                tile_provider=tile_provider,
-                output_file=output_file
-            )
-
-            if result == 0:
-                st.success("Map generated successfully!")
-                # Read the generated HTML file
-                with open(output_file, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-                
-                # Display the map in the app
-                st.components.v1.html(html_content, height=600)
-            else:
-                st.error("Failed to generate the map. Please check the console for details.")
-
-            return result
+            html_content = _build_map_html(lat, lon, tile_provider)
+            st.session_state['map_key'] = (lat, lon, tile_provider)
+            st.session_state['map_html'] = html_content
+            st.success("Map generated successfully!")
+
+            # Display the map in the app
+            st.components.v1.html(html_content, height=600)
+            return 0
 
         except ValueError as e:
             st.error(f"Invalid input: {str(e)}")
@@ -136,13 +147,6 @@ def handle_map_generation(lat, lon, tile_provider):
             st.error("An unexpected error occurred while generating the map.")
             st.error(f"Error: {str(e)}")
             st.error("Unexpected error:", exc_info=True)
-        finally:
-            # Clean up the temporary file if it exists
-            if 'output_file' in locals() and os.path.exists(output_file):
-                try:
-                    os.unlink(output_file)
-                except Exception as e:
-                    st.error(f"Error cleaning up temporary file: {e}")
         return None
 
 
@@ -157,8 +161,12 @@ def main():
         generate_btn = st.button("Generate Map", type="primary")
 
     # Main content area
+    map_key = (settings['lat'], settings['lon'], settings['tile_provider'])
     if generate_btn:
-        handle_map_generation(settings['lat'], settings['lon'], settings['tile_provider'])
+        handle_map_generation(*map_key)
+    elif st.session_state.get('map_key') == map_key:
+        # Keep showing the last generated map on reruns with unchanged settings
+        st.components.v1.html(st.session_state['map_html'], height=600)
     else:
         show_instructions()
 
@@ -1,18 +1,9 @@
 """Configuration settings for the parking zones application."""
-from typing import Dict, List, Tuple, Optional, Any
-import logging, sys
+from types import MappingProxyType
+from typing import Dict, List, Tuple, Optional, Any, Mapping, TextIO
+import logging, re, sys, unicodedata
 
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stderr),
-        logging.FileHandler('parking_zones.log')
-    ]
-)
-
 # Default settings
 DEFAULTS = {
     'target_point': (45.38096, 20.39373),  # Default center point (lat, lon)
@@ -20,6 +11,9 @@ DEFAULTS = {
     'map_filename': 'parking_map.html',     # Default output filename
     'tile_provider': 'openstreetmap',       # Default tile provider
     'radius': 10000,                         # Default radius in meters
+    'request_timeout': 30,                  # Overpass request timeout in seconds
+    'retry_backoff': 1.0,                   # Initial delay between fetch retries in seconds
+    'cache_folder': '.osmnx_cache',         # On-disk cache for Overpass responses
 }
 
 # Predefined locations with their coordinates
@@ -55,6 +49,11 @@ TILE_PROVIDERS = {
     },
 }
 
+# Tile provider display names mapped to their IDs (for UI selection)
+PROVIDER_NAME_TO_ID: Dict[str, str] = {
+    config['name']: pid for pid, config in TILE_PROVIDERS.items()
+}
+
 # Parking zone definitions
 PARKING_ZONES: Dict[str, List[str]] = {
     "red": [
@@ -71,6 +70,34 @@ PARKING_ZONES: Dict[str, List[str]] = {
     ]
 }
 
+# Leading "street" designators that OSM names may or may not carry (Cyrillic and Latin)
+_STREET_PREFIX_RE = re.compile(r'^(?:(?:улица|ulica)\s+|(?:ул|ul)\.\s*)')
+
+
+def normalize_street_name(name: str) -> str:
+    """
+    Normalize a street name for matching.
+    
+    Applies NFKC normalization and casefolding, collapses whitespace and drops
+    a leading "улица"/"ул." designator, so e.g. "ул.  Пупинова" matches "Пупинова".
+    
+    Args:
+        name: Street name as written in the config or in OSM data
+        
+    Returns:
+        The normalized street name
+    """
+    name = ' '.join(unicodedata.normalize('NFKC', name).casefold().split())
+    return _STREET_PREFIX_RE.sub('', name)
+
+
+# Read-only lookup of normalized street names to their zone colors, built once at import
+STREETS_TO_ZONE: Mapping[str, str] = MappingProxyType({
+    normalize_street_name(street): color
+    for color, streets in PARKING_ZONES.items()
+    for street in streets
+})
+
 # Map visualization settings
 ZONE_COLORS = {
     "red": "#FF0000",
@@ -94,6 +121,13 @@ ERROR_MESSAGES = {
     'no_streets_found': 'No streets found in the specified area. Try increasing the search radius or check the coordinates.',
 }
 
+# Single-lookup dispatch for get_tile_provider: provider IDs plus the None/'all' sentinels
+_TILE_PROVIDER_LOOKUP: Dict[Optional[str], Dict[str, Any]] = {
+    **TILE_PROVIDERS,
+    None: TILE_PROVIDERS[DEFAULTS['tile_provider']],
+    'all': TILE_PROVIDERS,
+}
+
 def get_tile_provider(provider_name: Optional[str] = None) -> Dict[str, Any]:
     """
     Get the configuration for a tile provider.
@@ -108,16 +142,37 @@ def get_tile_provider(provider_name: Optional[str] = None) -> Dict[str, Any]:
     Raises:
         ValueError: If the specified provider is not found and provider_name is not None or 'all'
     """
-    if provider_name is None:
-        # Return default provider if no specific provider requested
-        return TILE_PROVIDERS[DEFAULTS['tile_provider']]
-    elif provider_name.lower() == 'all':
-        # Return all providers
+    provider = _TILE_PROVIDER_LOOKUP.get(provider_name)
+    if provider is not None:
+        return provider
+
+    # Slow path: 'all' is accepted in any case
+    if isinstance(provider_name, str) and provider_name.lower() == 'all':
         return TILE_PROVIDERS
+    raise ValueError(ERROR_MESSAGES['tile_provider_not_found'])
 
-    # Return the requested provider or raise an error if not found
-    provider = TILE_PROVIDERS.get(provider_name)
 
-    if not provider:
-        raise ValueError(ERROR_MESSAGES['tile_provider_not_found'])
-    return provider
+def setup_logging(
+    stream: TextIO = sys.stderr,
+    fmt: str = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+) -> None:
+    """
+    Configure application logging (console + parking_zones.log).
+    
+    Safe to call more than once: handlers are only attached if the root logger
+    has none yet, so Streamlit reruns don't stack duplicate handlers or open
+    extra log file handles.
+    
+    Args:
+        stream: Stream for the console handler
+        fmt: Log record format for both handlers
+    """
+    root_logger = logging.getLogger()
+    if root_logger.hasHandlers():
+        return
+
+    formatter = logging.Formatter(fmt)
+    for handler in (logging.StreamHandler(stream), logging.FileHandler('parking_zones.log')):
+        handler.setFormatter(formatter)
+        root_logger.addHandler(handler)
+    root_logger.setLevel(logging.INFO)
@@ -9,23 +9,15 @@ Example usage:
     python main.py --lat 45.38 --lon 20.39  --output my_map.html --tile-provider "Stamen Terrain"
 """
 import argparse
+import gzip
 import logging
 import sys
-from typing import Tuple
+from typing import Callable, Optional, Tuple, Union
 
-from config import DEFAULTS, get_tile_provider, ERROR_MESSAGES
+from config import DEFAULTS, get_tile_provider, ERROR_MESSAGES, setup_logging
 from parking_zones import ParkingZoneProcessor
 from map_utils import create_map, add_zone_polylines, add_map_legend
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('parking_zones.log')
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
@@ -59,7 +51,7 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         '-o', '--output',
         default=DEFAULTS['map_filename'],
-        help='Output HTML filename'
+        help='Output HTML filename (a .gz suffix writes it gzip-compressed)'
     )
     # Get the list of available tile providers with their display names
     available_providers = get_tile_provider('all')
@@ -104,7 +96,14 @@ def validate_coordinates(lat: float, lon: float) -> Tuple[float, float]:
 
 
 
-def generate_map(lat: float, lon: float, tile_provider: str, output_file: str) -> int:
+def generate_map(
+    lat: float,
+    lon: float,
+    tile_provider: str,
+    output_file: str = DEFAULTS['map_filename'],
+    in_memory: bool = False,
+    graph_fetcher: Optional[Callable] = None
+) -> Union[int, str]:
     """
     Generate a parking zone map with the given parameters.
     
@@ -112,10 +111,13 @@ def generate_map(lat: float, lon: float, tile_provider: str, output_file: str) -
         lat: Latitude of the center point
         lon: Longitude of the center point
         tile_provider: Name of the tile provider to use
-        output_file: Path to save the generated map HTML file
+        output_file: Path to save the generated map HTML file (ignored when in_memory is True).
+                     A '.gz' suffix writes the HTML gzip-compressed.
+        in_memory: Return the rendered HTML instead of writing it to output_file
+        graph_fetcher: Optional (lat, lon, radius) -> graph callable, e.g. a cached fetcher
         
     Returns:
-        int: 0 on success, non-zero on error
+        The rendered map HTML if in_memory is True, otherwise int: 0 on success, non-zero on error
     """
     try:
         # Validate coordinates
@@ -127,7 +129,8 @@ def generate_map(lat: float, lon: float, tile_provider: str, output_file: str) -
         # Initialize the processor
         processor = ParkingZoneProcessor(
             target_point=target_point,
-            tile_provider=tile_provider
+            tile_provider=tile_provider,
+            graph_fetcher=graph_fetcher
         )
         
         # Fetch and process map data
@@ -151,8 +154,16 @@ def generate_map(lat: float, lon: float, tile_provider: str, output_file: str) -
         add_zone_polylines(m, processor.zone_geometries)
         add_map_legend(m)
         
-        # Save the map to file
-        m.save(output_file)
+        if in_memory:
+            logger.info("Map successfully rendered in memory")
+            return m.get_root().render()
+        
+        # Save the map to file, gzip-compressed when the filename asks for it
+        if output_file.endswith('.gz'):
+            with gzip.open(output_file, 'wb') as f:
+                m.save(f, close_file=False)
+        else:
+            m.save(output_file)
         logger.info(f"Map successfully saved to {output_file}")
         
         return 0
@@ -197,6 +208,8 @@ def main():
 
 
 if __name__ == "__main__":
+    # The CLI logs progress to stdout, without logger names
+    setup_logging(stream=sys.stdout, fmt='%(asctime)s - %(levelname)s - %(message)s')
     try:
         sys.exit(main())
     except Exception as e:
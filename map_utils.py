@@ -1,16 +1,47 @@
 """Utility functions for map processing and visualization."""
 import logging
-from typing import Dict, List, Tuple, Any, Set, Optional
+from typing import Dict, List, Tuple, Any, Set, Optional, Mapping
 
 import folium
+import numpy as np
+import pandas as pd
 from folium import Element, TileLayer, LayerControl
-import osmnx as ox
 
-from config import ZONE_COLORS, MARKER_SETTINGS, DEFAULTS, get_tile_provider, ERROR_MESSAGES
+from config import (
+    ZONE_COLORS, MARKER_SETTINGS, DEFAULTS, TILE_PROVIDERS, ERROR_MESSAGES, normalize_street_name
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Zoom limits for tile providers that don't define their own
+_DEFAULT_MIN_ZOOM = 1
+_DEFAULT_MAX_ZOOM = 19
+
+# Per-zone segment geometry in structure-of-arrays form: an (N, 2) float array of
+# (lat, lon) points, M + 1 offsets delimiting each segment's points, and M street names
+ZoneGeometry = Tuple[np.ndarray, np.ndarray, List[str]]
+
+# Zone colors in a fixed order, used to seed per-request result dicts
+_ZONE_KEYS = tuple(ZONE_COLORS)
+
+# Static HTML for the zone color legend
+_LEGEND_HTML = """
+<div style="position: fixed;
+            top: 50px; left: 50px; width: 180px; height: 100px; padding: 12px;
+            border:2px solid grey; z-index:9999; font-size:14px;
+            background-color:white; opacity: 0.9;
+            ">  <b>Легенда (Зоне)</b> <br>
+    <i class="fa fa-square" style="color:red"></i>  Црвена зона<br>
+    <i class="fa fa-square" style="color:yellow"></i>  Жута зона<br>
+    <i class="fa fa-square" style="color:green"></i>  Зелена зона
+</div>
+"""
+# Built once: Element compiles its template as a Jinja template on construction.
+# Sharing it between maps is safe because rendering never reads the parent that
+# add_child() reassigns.
+_LEGEND_ELEMENT = Element(_LEGEND_HTML)
+
 
 def create_map(
     location: Tuple[float, float] = DEFAULTS['target_point'],
@@ -32,11 +63,8 @@ def create_map(
         ValueError: If the tile provider is not found
     """
     try:
-        # Get all available providers
-        all_providers = get_tile_provider('all')
-        
         # Get the default provider config
-        default_provider = all_providers.get(tile_provider)
+        default_provider = TILE_PROVIDERS.get(tile_provider)
         if not default_provider:
             raise ValueError(f"Tile provider '{tile_provider}' not found")
         
@@ -49,14 +77,14 @@ def create_map(
         )
         
         # Add all tile providers as base layers
-        for provider_id, provider_config in all_providers.items():
+        for provider_id, provider_config in TILE_PROVIDERS.items():
             is_default = (provider_id == tile_provider)
             TileLayer(
                 tiles=provider_config['tiles'],
                 attr=provider_config['attr'],
                 name=provider_config['name'],
-                min_zoom=provider_config.get('min_zoom', 1),
-                max_zoom=provider_config.get('max_zoom', 19),
+                min_zoom=provider_config.get('min_zoom', _DEFAULT_MIN_ZOOM),
+                max_zoom=provider_config.get('max_zoom', _DEFAULT_MAX_ZOOM),
                 overlay=False,
                 control=True,
                 show=is_default  # Only show the default provider initially
@@ -83,37 +111,86 @@ def add_map_legend(folium_map: folium.Map) -> None:
         folium_map: The Folium map instance to add the legend to.
     """
     try:
-        legend_html = """
-        <div style="position: fixed;
-                    top: 50px; left: 50px; width: 180px; height: 100px; padding: 12px;
-                    border:2px solid grey; z-index:9999; font-size:14px;
-                    background-color:white; opacity: 0.9;
-                    ">  <b>Легенда (Зоне)</b> <br>
-            <i class="fa fa-square" style="color:red"></i>  Црвена зона<br>
-            <i class="fa fa-square" style="color:yellow"></i>  Жута зона<br>
-            <i class="fa fa-square" style="color:green"></i>  Зелена зона
-        </div>
-        """
-        folium_map.get_root().html.add_child(Element(legend_html))
+        folium_map.get_root().html.add_child(_LEGEND_ELEMENT)
     except Exception as e:
         logger.error(f"Failed to add map legend: {str(e)}")
         raise
 
 
+def _node_coordinates(graph) -> Tuple[Dict[Any, int], np.ndarray, np.ndarray]:
+    """
+    Extract node coordinates into parallel arrays indexed by a dense node id.
+    
+    Args:
+        graph: The OSMnx graph containing street data.
+        
+    Returns:
+        A tuple of (node id -> array index, latitudes, longitudes). Nodes without
+        coordinates are left out of the index, so looking them up raises KeyError.
+    """
+    located = [(node, data) for node, data in graph.nodes(data=True) if 'y' in data and 'x' in data]
+    node_index = {node: i for i, (node, _) in enumerate(located)}
+    ys = np.fromiter((data['y'] for _, data in located), dtype=np.float64, count=len(located))
+    xs = np.fromiter((data['x'] for _, data in located), dtype=np.float64, count=len(located))
+    return node_index, ys, xs
+
+
+def _way_key(osmid: Any) -> Any:
+    """
+    Return a hashable, direction-independent form of an edge's OSM way id(s).
+    
+    Simplified OSMnx edges may carry a list of way ids, in path order, so both
+    directions of the same street are normalized to the same sorted tuple.
+    """
+    if isinstance(osmid, list):
+        return tuple(sorted(set(osmid)))
+    return osmid
+
+
+def _shape_key(geometry: Any) -> Optional[Tuple[Tuple[float, ...], ...]]:
+    """
+    Return a hashable, direction-independent form of an edge's geometry.
+    
+    A LineString and its reverse map to the same key; edges without a
+    geometry (straight segments) map to None.
+    """
+    if geometry is None:
+        return None
+    coords = tuple(geometry.coords)
+    return min(coords, coords[::-1])
+
+
+def _pack_segments(blocks: List[np.ndarray], names: List[str]) -> ZoneGeometry:
+    """
+    Pack per-segment point blocks into a single coordinate array plus offsets.
+    
+    Args:
+        blocks: One (n, 2) array of (lat, lon) points per segment.
+        names: Street name of each segment.
+        
+    Returns:
+        The (coordinates, offsets, names) geometry of a zone.
+    """
+    offsets = np.zeros(len(blocks) + 1, dtype=np.intp)
+    offsets[1:] = np.cumsum([len(block) for block in blocks])
+    coords = np.concatenate(blocks) if blocks else np.empty((0, 2), dtype=np.float64)
+    return coords, offsets, names
+
+
 def process_street_geometries(
-    graph: ox.graph,
-    streets_to_zone: Dict[str, str]
-) -> Tuple[Dict[str, List[Tuple[List[Tuple[float, float]], str]]], Set[str]]:
+    graph: "networkx.MultiDiGraph",
+    streets_to_zone: Mapping[str, str]
+) -> Tuple[Dict[str, ZoneGeometry], Set[str]]:
     """
     Process street geometries and group them by their parking zones.
     
     Args:
         graph: The OSMnx graph containing street data.
-        streets_to_zone: Dictionary mapping street names to their zone colors.
+        streets_to_zone: Mapping of normalized street names to their zone colors.
         
     Returns:
         A tuple containing:
-        - Dictionary mapping zone colors to lists of (geometry, street_name) tuples
+        - Dictionary mapping zone colors to (coordinates, offsets, street names) arrays
         - Set of found street names
         
     Raises:
@@ -122,34 +199,78 @@ def process_street_geometries(
     if not graph or len(graph) == 0:
         raise ValueError("Empty graph provided. Cannot process street geometries.")
     
-    zone_geometries = {color: [] for color in ZONE_COLORS}
-    found_streets = set()
+    node_index, ys, xs = _node_coordinates(graph)
     
     try:
-        for u, v, data in graph.edges(data=True):
-            street_name = data.get('name')
-            if not street_name:
-                continue
-
-            street_names = [street_name] if isinstance(street_name, str) else street_name
-
-            for name in street_names:
-                zone_color = streets_to_zone.get(name.lower())
-                if zone_color:
-                    try:
-                        line_points = [
-                            (graph.nodes[u]['y'], graph.nodes[u]['x']),
-                            (graph.nodes[v]['y'], graph.nodes[v]['x'])
-                        ]
-                        zone_geometries[zone_color].append((line_points, name))
-                        found_streets.add(name.lower())
-                        break  # Found a match, no need to check other names
-                    except KeyError as e:
-                        logger.warning(f"Missing coordinate data for street segment: {name}. Error: {e}")
-                        continue
+        # One row per (edge, street name); OSM edges may carry a list of names
+        edges = pd.DataFrame(
+            list(graph.edges(keys=True, data='name')),
+            columns=['u', 'v', 'key', 'name']
+        ).dropna(subset=['name']).explode('name', ignore_index=True)
+
+        # Street names repeat across many segments, so normalize each distinct name once
+        normalized = {
+            name: normalize_street_name(name) for name in edges['name'].unique() if isinstance(name, str)
+        }
+        edges['name_lc'] = edges['name'].map(normalized)
+
+        # Most streets in the area aren't in any zone; drop them with one hash probe each
+        wanted = frozenset(streets_to_zone)
+        matched = edges[edges['name_lc'].isin(wanted)].copy()
+        matched['zone'] = matched['name_lc'].map(pd.Series(dict(streets_to_zone), dtype=object))
+
+        # Keep the first matching name of each edge, and only one direction of
+        # two-way streets. OSMnx stores those as u->v and v->u copies with the same
+        # OSM way ids and equal-or-reversed geometry (the rule osmnx itself uses
+        # when converting to undirected). Edges between the same nodes that differ
+        # in way or shape, such as divided carriageways or the two arcs of a
+        # one-way loop, are kept.
+        adjacency = graph.adj
+        edge_data = [
+            adjacency[u][v][key] for u, v, key in zip(matched['u'], matched['v'], matched['key'])
+        ]
+        u_ids, v_ids = matched['u'].to_numpy(), matched['v'].to_numpy()
+        matched = matched.assign(
+            pair_lo=np.minimum(u_ids, v_ids),
+            pair_hi=np.maximum(u_ids, v_ids),
+            way=[_way_key(data.get('osmid')) for data in edge_data],
+            shape=[_shape_key(data.get('geometry')) for data in edge_data]
+        ).drop_duplicates(['pair_lo', 'pair_hi', 'way', 'shape'])
+
+        # Nodes without coordinates are rare, so only filter segments if the graph has any
+        if len(node_index) < len(graph):
+            bad_nodes = set(graph.nodes) - node_index.keys()
+            unlocated = (matched['u'].isin(bad_nodes) | matched['v'].isin(bad_nodes)).to_numpy()
+            for name in matched['name'].to_numpy()[unlocated]:
+                logger.warning(f"Missing coordinate data for street segment: {name}")
+            matched = matched[~unlocated]
+
+        # Resolve both endpoints to coordinate-array indices in one pass
+        iu = matched['u'].map(node_index).to_numpy(dtype=np.intp)
+        iv = matched['v'].map(node_index).to_numpy(dtype=np.intp)
+        zone_segments = {color: ([], []) for color in _ZONE_KEYS}
+        for zone_color, name, u, v, key, y_u, x_u, y_v, x_v in zip(
+            matched['zone'], matched['name'], matched['u'], matched['v'], matched['key'],
+            ys[iu].tolist(), xs[iu].tolist(), ys[iv].tolist(), xs[iv].tolist()
+        ):
+            # Simplified OSMnx edges keep their real (lon, lat) shape; others are straight segments
+            geometry = adjacency[u][v][key].get('geometry')
+            if geometry is not None:
+                points = np.asarray(geometry.coords)[:, ::-1]
+            else:
+                points = np.array(((y_u, x_u), (y_v, x_v)))
+            blocks, names = zone_segments[zone_color]
+            blocks.append(points)
+            names.append(name)
+
+        zone_geometries = {
+            color: _pack_segments(blocks, names) for color, (blocks, names) in zone_segments.items()
+        }
+
+        found_streets = set(matched['name_lc'])
         
         # Check if any streets were found
-        if not any(zone_geometries.values()):
+        if matched.empty:
             logger.warning("No streets matching the parking zones were found in the area.")
             
         return zone_geometries, found_streets
@@ -161,25 +282,60 @@ def process_street_geometries(
 
 def add_zone_polylines(
     folium_map: folium.Map,
-    zone_geometries: Dict[str, List[Tuple[List[Tuple[float, float]], str]]]
+    zone_geometries: Dict[str, ZoneGeometry]
 ) -> None:
     """
     Add zone polylines to the Folium map.
     
+    Each zone is added as a single GeoJson layer holding one feature per street,
+    rather than one PolyLine object per street segment. Contiguous segments of
+    a street are merged into continuous lines first. Zones are wrapped in
+    feature groups so they can be toggled from the layer control.
+    
     Args:
         folium_map: The Folium map to add the polylines to.
-        zone_geometries: Dictionary mapping zone colors to lists of (geometry, name) tuples.
-    """
-    for color, geometries in zone_geometries.items():
-        for points, name in geometries:
-            folium.PolyLine(
-                locations=points,
-                color=color,
-                weight=5,
-                opacity=0.8,
-                popup=folium.Popup(f'Улица: {name}<br>Зона: {color.capitalize()}', 
-                                 max_width=300)
-            ).add_to(folium_map)
+        zone_geometries: Dictionary mapping zone colors to (coordinates, offsets, names) arrays.
+    """
+    # shapely is only needed once there are zones to draw, so keep it off the import path
+    from shapely.geometry import MultiLineString, mapping
+    from shapely.ops import linemerge
+
+    for color, (coords, offsets, names) in zone_geometries.items():
+        if not names:
+            continue
+
+        # Shared by every street of the zone: popup/group label and the per-feature style
+        zone_label = color.capitalize()
+        zone_style = {'color': color, 'weight': 5, 'opacity': 0.8}
+
+        # Group segments by street; GeoJSON expects (lon, lat) coordinate order
+        lon_lat = coords[:, ::-1]
+        segments_by_street: Dict[str, List[np.ndarray]] = {}
+        for name, start, end in zip(names, offsets[:-1].tolist(), offsets[1:].tolist()):
+            segments_by_street.setdefault(name, []).append(lon_lat[start:end])
+
+        features = [
+            {
+                'type': 'Feature',
+                'geometry': mapping(linemerge(MultiLineString(segments))),
+                'properties': {'name': name, 'zone': zone_label},
+            }
+            for name, segments in segments_by_street.items()
+        ]
+
+        zone_group = folium.FeatureGroup(name=f'Зона: {zone_label}')
+        folium.GeoJson(
+            {'type': 'FeatureCollection', 'features': features},
+            style_function=lambda _, zone_style=zone_style: zone_style,
+            tooltip=folium.GeoJsonTooltip(fields=['name'], labels=False),
+            popup=folium.GeoJsonPopup(
+                fields=['name', 'zone'],
+                aliases=['Улица:', 'Зона:'],
+                max_width=300
+            ),
+            control=False
+        ).add_to(zone_group)
+        zone_group.add_to(folium_map)
 
 
 def add_center_marker(folium_map: folium.Map) -> None:
@@ -1,27 +1,62 @@
 """Core functionality for managing and processing parking zones."""
 import logging
-import osmnx as ox
+import time
+from collections import Counter
 
 from config import (
     DEFAULTS, 
-    PARKING_ZONES, 
+    STREETS_TO_ZONE, 
     ERROR_MESSAGES,
-    get_tile_provider
+    TILE_PROVIDERS
 )
 from map_utils import process_street_geometries
-from typing import Dict, Set, Tuple, Optional
+from typing import Callable, Set, Tuple, Optional
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
+def fetch_graph(lat: float, lon: float, radius: int):
+    """
+    Fetch the street graph around a point from OpenStreetMap.
+    
+    Callers that cache the result (e.g. the Streamlit app) share one graph
+    across calls, so it must be treated as read-only.
+    
+    Raises:
+        ValueError: If OpenStreetMap returns an empty graph
+    """
+    # osmnx pulls in geopandas/shapely/networkx, so only import it when a fetch is needed
+    import osmnx as ox
+
+    # Fail fast on a stalled Overpass request instead of waiting for the osmnx default (180s)
+    ox.settings.requests_timeout = DEFAULTS['request_timeout']
+    # Reuse downloaded Overpass responses across processes
+    ox.settings.use_cache = True
+    ox.settings.cache_folder = DEFAULTS['cache_folder']
+
+    # Parking zones only apply to streets cars can use. 'drive_service' keeps service
+    # ways (alleys, driveways) but, unlike 'all', excludes highway=pedestrian and
+    # motor_vehicle/motorcar=no ways, so zone streets tagged that way are not drawn.
+    graph = ox.graph_from_point(
+        center_point=(lat, lon),
+        network_type='drive_service',
+        dist=radius,
+        simplify=True
+    )
+    if not graph or len(graph) == 0:
+        raise ValueError("Received empty graph from OpenStreetMap")
+    return graph
+
+
 class ParkingZoneProcessor:
     """Handles processing and managing parking zone data."""
     
     def __init__(
         self,
         target_point: Optional[Tuple[float, float]] = None,
-        tile_provider: Optional[str] = None
+        tile_provider: Optional[str] = None,
+        graph_fetcher: Optional[Callable] = None
     ):
         """
         Initialize the ParkingZoneProcessor with configuration.
@@ -31,17 +66,21 @@ class ParkingZoneProcessor:
                          If None, uses the default from config.
             tile_provider: Name of the tile provider to use for the map.
                           If None, uses the default from config.
+            graph_fetcher: Callable taking (lat, lon, radius) and returning the street graph.
+                           If None, uses fetch_graph (no caching beyond the osmnx HTTP cache).
         """
         self.target_point = target_point or DEFAULTS['target_point']
         self.tile_provider = tile_provider or DEFAULTS['tile_provider']
+        self.graph_fetcher = graph_fetcher or fetch_graph
         
         # Validate inputs
         self._validate_config()
         
         # Initialize instance variables
-        self.street_to_zone = self._prepare_street_to_zone_lookup()
+        self.street_to_zone = STREETS_TO_ZONE
         self.graph = None
         self.zone_geometries = {}
+        self.zone_counts = Counter()
         self.found_streets = set()
         logger.info(f"Initialized ParkingZoneProcessor with center at {self.target_point}, "
                     f"tile provider: {self.tile_provider}")
@@ -56,27 +95,13 @@ class ParkingZoneProcessor:
                 raise ValueError(ERROR_MESSAGES['invalid_coordinates'])
                 
             # Validate tile provider
-            if self.tile_provider not in get_tile_provider('all'):
+            if self.tile_provider not in TILE_PROVIDERS:
                 raise ValueError(ERROR_MESSAGES['tile_provider_not_found'])
                 
         except Exception as e:
             logger.error(f"Configuration validation failed: {str(e)}")
             raise
     
-    @staticmethod
-    def _prepare_street_to_zone_lookup() -> Dict[str, str]:
-        """
-        Create a lookup dictionary mapping street names to their zone colors.
-        
-        Returns:
-            Dictionary mapping street names (lowercase) to zone colors.
-        """
-        street_map = {}
-        for color, streets in PARKING_ZONES.items():
-            for street in streets:
-                street_map[street.lower()] = color
-        return street_map
-    
     def fetch_map_data(self, max_retries: int = 3) -> None:
         """
         Fetch OpenStreetMap data for the target area.
@@ -93,20 +118,8 @@ class ParkingZoneProcessor:
         for attempt in range(1, max_retries + 1):
             try:
                 # Try to fetch the graph data
-                self.graph = ox.graph_from_point(
-                    center_point=self.target_point,
-                    network_type='all',
-                    dist=DEFAULTS['radius'],
-                    simplify=True
-                )
-                
-                # Validate the graph
-                if not self.graph or len(self.graph) == 0:
-                    error_msg = "Received empty graph from OpenStreetMap"
-                    logger.warning(f"Attempt {attempt}/{max_retries}: {error_msg}")
-                    if attempt == max_retries:
-                        raise ValueError(ERROR_MESSAGES['no_streets_found'])
-                    continue
+                lat, lon = self.target_point
+                self.graph = self.graph_fetcher(lat, lon, DEFAULTS['radius'])
                     
                 logger.info(f"Successfully fetched map data with {len(self.graph)} nodes")
                 return
@@ -118,7 +131,10 @@ class ParkingZoneProcessor:
                         raise ConnectionError(ERROR_MESSAGES['map_data_fetch_failed']) from e
                     raise ValueError(ERROR_MESSAGES['no_streets_found']) from e
                 
-                logger.warning(f"Attempt {attempt}/{max_retries} failed: {str(e)}")
+                # Back off exponentially before the next attempt
+                delay = DEFAULTS['retry_backoff'] * 2 ** (attempt - 1)
+                logger.warning(f"Attempt {attempt}/{max_retries} failed: {str(e)}. Retrying in {delay:.0f}s")
+                time.sleep(delay)
     
     def process_zones(self) -> None:
         """
@@ -137,11 +153,16 @@ class ParkingZoneProcessor:
                 self.graph, self.street_to_zone
             )
             
+            # Count segments per zone once; the summary below and log_processing_summary reuse it
+            self.zone_counts = Counter({
+                color: len(names) for color, (_, _, names) in self.zone_geometries.items()
+            })
+            
             # Log summary of found zones
-            for color, geometries in self.zone_geometries.items():
-                logger.info(f"Found {len(geometries)} street segments in {color} zone")
+            for color, count in self.zone_counts.items():
+                logger.info(f"Found {count} street segments in {color} zone")
                 
-            if not any(self.zone_geometries.values()):
+            if sum(self.zone_counts.values()) == 0:
                 logger.warning("No parking zones were found in the specified area.")
                 
         except Exception as e:
@@ -155,16 +176,17 @@ class ParkingZoneProcessor:
         Returns:
             Set of street names that were not found.
         """
-        all_streets = set(self.street_to_zone.keys())
-        return all_streets - self.found_streets
+        return self.street_to_zone.keys() - self.found_streets
     
     def log_processing_summary(self) -> None:
         """Log a summary of the processing results."""
-        for color, geometries in self.zone_geometries.items():
-            logging.info(f"Found {len(geometries)} street segments for the {color} zone.")
+        for color, count in self.zone_counts.items():
+            logger.info(f"Found {count} street segments for the {color} zone.")
         
+        # Only sort and format the list if it will actually be emitted, and emit it as one record
+        if not logger.isEnabledFor(logging.WARNING):
+            return
         missing = self.get_missing_streets()
         if missing:
-            logging.warning(f"Could not find map data for {len(missing)} streets:")
-            for street in sorted(missing):
-                logging.warning(f" - {street.capitalize()}")
+            street_lines = "\n".join(f" - {street.capitalize()}" for street in sorted(missing))
+            logger.warning(f"Could not find map data for {len(missing)} streets:\n{street_lines}")